@@ -193,7 +193,18 @@ contract CubePool is ReentrancyGuard {
         require(_params.added, "Not added");
 
         if (!_params.updatePaused) {
-            (uint256 price, uint256 _totalEquity) = _priceAndTotalEquity(cubeToken);
+            _update(cubeToken, feedsRegistry.getPrice(_params.currencyKey));
+        }
+    }
+
+    /**
+     * @dev Update price and total equity given the latest oracle price. If
+     * the price hasn't changed, total equity hasn't changed either so nothing
+     * is written.
+     */
+    function _update(CubeToken cubeToken, uint256 spot) internal {
+        (uint256 price, uint256 _totalEquity) = _priceAndTotalEquityFromSpot(cubeToken, spot);
+        if (price != params[cubeToken].lastPrice) {
             _updatePrice(cubeToken, price);
             totalEquity = _totalEquity;
         }
@@ -217,13 +228,47 @@ contract CubePool is ReentrancyGuard {
      * @notice Update all cube tokens which haven't been updated in the last
      * `maxStaleTime` seconds. Should be called periodically by an external
      * keeper so that the total equity doesn't get too far out of sync.
+     * @dev Oracle prices are cached so cube tokens with the same underlying
+     * only fetch it once.
      */
     function updateAll(uint256 maxStaleTime) external {
-        for (uint256 i = 0; i < cubeTokens.length; i = i.add(1)) {
+        uint256 n = cubeTokens.length;
+        bytes32[] memory cachedKeys = new bytes32[](n);
+        uint256[] memory cachedSpots = new uint256[](n);
+
+        for (uint256 i = 0; i < n; i = i.add(1)) {
             CubeToken cubeToken = cubeTokens[i];
-            if (params[cubeToken].lastUpdated.add(maxStaleTime) <= block.timestamp) {
-                update(cubeToken);
+            CubeTokenParams storage _params = params[cubeToken];
+            if (_params.updatePaused || _params.lastUpdated.add(maxStaleTime) > block.timestamp) {
+                continue;
+            }
+            _update(cubeToken, _getSpotCached(_params.currencyKey, cachedKeys, cachedSpots));
+        }
+    }
+
+    /**
+     * @dev Look up oracle price in `cachedKeys` and `cachedSpots`. If not
+     * found, fetch it from the oracle and add it to the first empty slot.
+     */
+    function _getSpotCached(
+        bytes32 currencyKey,
+        bytes32[] memory cachedKeys,
+        uint256[] memory cachedSpots
+    ) internal view returns (uint256 spot) {
+        uint256 i = 0;
+        for (; i < cachedKeys.length; i = i.add(1)) {
+            if (cachedKeys[i] == 0) {
+                break;
             }
+            if (cachedKeys[i] == currencyKey) {
+                return cachedSpots[i];
+            }
+        }
+
+        spot = feedsRegistry.getPrice(currencyKey);
+        if (i < cachedKeys.length) {
+            cachedKeys[i] = currencyKey;
+            cachedSpots[i] = spot;
         }
     }
 
@@ -244,7 +289,7 @@ contract CubePool is ReentrancyGuard {
     ) external onlyGovernance returns (address) {
         require(address(cubeTokensMap[spotSymbol][inverse]) == address(0), "Already added");
 
-        bytes32 salt = keccak256(abi.encodePacked(spotSymbol, inverse));
+        bytes32 salt = _cubeTokenSalt(spotSymbol, inverse);
         CubeToken cubeToken = CubeToken(Clones.cloneDeterministic(address(cubeTokenImpl), salt));
         cubeToken.initialize(address(this), spotSymbol, inverse);
 
@@ -320,14 +365,37 @@ contract CubePool is ReentrancyGuard {
         return cubeTokens.length;
     }
 
+    /**
+     * @notice Address at which the cube token for `spotSymbol` and `inverse`
+     * is or will be deployed. Cube tokens are deployed with CREATE2 so their
+     * addresses are known before they are added.
+     */
+    function predictCubeTokenAddress(string memory spotSymbol, bool inverse) external view returns (address) {
+        bytes32 salt = _cubeTokenSalt(spotSymbol, inverse);
+        return Clones.predictDeterministicAddress(address(cubeTokenImpl), salt);
+    }
+
+    /// @dev Salt used to deploy cube token clone with CREATE2
+    function _cubeTokenSalt(string memory spotSymbol, bool inverse) internal pure returns (bytes32) {
+        return keccak256(abi.encodePacked(spotSymbol, inverse));
+    }
+
     /// @dev Calculate price and total equity from latest oracle price
     function _priceAndTotalEquity(CubeToken cubeToken) internal view returns (uint256 price, uint256 _totalEquity) {
         CubeTokenParams storage _params = params[cubeToken];
         if (_params.updatePaused) {
             return (_params.lastPrice, totalEquity);
         }
+        return _priceAndTotalEquityFromSpot(cubeToken, feedsRegistry.getPrice(_params.currencyKey));
+    }
 
-        uint256 spot = feedsRegistry.getPrice(_params.currencyKey);
+    /// @dev Calculate price and total equity from given oracle price
+    function _priceAndTotalEquityFromSpot(CubeToken cubeToken, uint256 spot)
+        internal
+        view
+        returns (uint256 price, uint256 _totalEquity)
+    {
+        CubeTokenParams storage _params = params[cubeToken];
 
         // Divide by the spot price at the time the cube token was added.
         // This helps the price not be too large or small which could cause
@@ -417,6 +485,24 @@ contract CubePool is ReentrancyGuard {
      * the underlying Chainlink feed to avoid technical frontrunning.
      */
     function setDepositWithdrawFee(CubeToken cubeToken, uint256 depositWithdrawFee) external onlyGovernance {
+        _setDepositWithdrawFee(cubeToken, depositWithdrawFee);
+    }
+
+    /**
+     * @notice Set deposit and withdrawal fees for multiple cube tokens in a
+     * single transaction. See `setDepositWithdrawFee()`.
+     */
+    function setDepositWithdrawFees(CubeToken[] calldata _cubeTokens, uint256[] calldata depositWithdrawFees)
+        external
+        onlyGovernance
+    {
+        require(_cubeTokens.length == depositWithdrawFees.length, "Lengths don't match");
+        for (uint256 i = 0; i < _cubeTokens.length; i = i.add(1)) {
+            _setDepositWithdrawFee(_cubeTokens[i], depositWithdrawFees[i]);
+        }
+    }
+
+    function _setDepositWithdrawFee(CubeToken cubeToken, uint256 depositWithdrawFee) internal {
         require(params[cubeToken].added, "Not added");
         require(depositWithdrawFee < 1e4, "Fee should be < 100%");
         params[cubeToken].depositWithdrawFee = depositWithdrawFee;
@@ -8,6 +8,10 @@ contract MockAggregatorV3Interface is AggregatorV3Interface {
     uint8 internal _decimals;
     int256 internal _price;
 
+    constructor(int256 price) public {
+        _price = price;
+    }
+
     function decimals() external override view returns (uint8) {
         return _decimals;
     }
@@ -19,6 +19,20 @@ contract CubePoolMulticall is Ownable, ReentrancyGuard {
         }
     }
 
+    function getPool(CubePool pool)
+        external
+        view
+        returns (
+            uint256 balance,
+            uint256 poolBalance,
+            uint256 totalEquity
+        )
+    {
+        balance = address(pool).balance;
+        poolBalance = pool.poolBalance();
+        totalEquity = pool.totalEquity();
+    }
+
     function getCubeToken(CubePool pool, CubeToken cubeToken)
         external
         view
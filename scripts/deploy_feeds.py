@@ -3,7 +3,10 @@ from brownie import (
     ChainlinkFeedsRegistry,
 )
 from brownie.network.gas.strategies import GasNowScalingStrategy
-import time
+import os
+
+
+PUBLISH_SOURCE = os.environ.get("PUBLISH_SOURCE", "1") == "1"
 
 
 # https://docs.chain.link/docs/ethereum-addresses
@@ -25,9 +28,8 @@ def main():
     gas_strategy = GasNowScalingStrategy()
 
     feeds = deployer.deploy(
-        ChainlinkFeedsRegistry, publish_source=True, gas_price=gas_strategy
+        ChainlinkFeedsRegistry, publish_source=PUBLISH_SOURCE, gas_price=gas_strategy
     )
-    time.sleep(5)
 
     for symbol, feed in USD_FEEDS.items():
         feeds.addUsdFeed(symbol, feed, {"gas_price": gas_strategy})
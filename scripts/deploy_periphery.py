@@ -3,6 +3,10 @@ from brownie import (
     CubePoolMulticall,
 )
 from brownie.network.gas.strategies import GasNowScalingStrategy
+import os
+
+
+PUBLISH_SOURCE = os.environ.get("PUBLISH_SOURCE", "1") == "1"
 
 
 def main():
@@ -12,7 +16,7 @@ def main():
     gas_strategy = GasNowScalingStrategy()
 
     multicall = deployer.deploy(
-        CubePoolMulticall, publish_source=True, gas_price=gas_strategy
+        CubePoolMulticall, publish_source=PUBLISH_SOURCE, gas_price=gas_strategy
     )
 
     print(f"Multicall address: {multicall.address}")
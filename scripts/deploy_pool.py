@@ -1,12 +1,14 @@
 from brownie import (
     accounts,
-    ChainlinkFeedsRegistry,
     CubePool,
     CubeToken,
     ZERO_ADDRESS,
 )
 from brownie.network.gas.strategies import GasNowScalingStrategy
-import time
+import os
+
+
+PUBLISH_SOURCE = os.environ.get("PUBLISH_SOURCE", "1") == "1"
 
 
 LONG = False
@@ -34,7 +36,7 @@ def main():
     gas_strategy = GasNowScalingStrategy()
 
     cubeTokenImpl = deployer.deploy(
-        CubeToken, publish_source=True, gas_price=gas_strategy
+        CubeToken, publish_source=PUBLISH_SOURCE, gas_price=gas_strategy
     )
     cubeTokenImpl.initialize(ZERO_ADDRESS, "", False, {"gas_price": gas_strategy})
 
@@ -42,23 +44,28 @@ def main():
         CubePool,
         FEEDS_CONTRACT,
         cubeTokenImpl,
-        publish_source=True,
+        publish_source=PUBLISH_SOURCE,
         gas_price=gas_strategy,
     )
-    time.sleep(5)
 
     pool.setProtocolFee(2000, {"gas_price": gas_strategy})  # 20%
     pool.setMaxPoolBalance(100e18, {"gas_price": gas_strategy})  # 100 eth
 
+    cubeTokens = {}
+
     # 1.5% fee
     for symbol in SYMBOLS_150:
-        pool.addCubeToken(symbol, LONG, 150, 0, {"gas_price": gas_strategy})
-        pool.addCubeToken(symbol, SHORT, 150, 0, {"gas_price": gas_strategy})
+        for inverse in [LONG, SHORT]:
+            tx = pool.addCubeToken(symbol, inverse, 150, 0, 0, {"gas_price": gas_strategy})
+            cubeTokens[symbol, inverse] = tx.events["AddCubeToken"]["cubeToken"]
 
     # 3% fee
     for symbol in SYMBOLS_300:
-        pool.addCubeToken(symbol, LONG, 300, 0, {"gas_price": gas_strategy})
-        pool.addCubeToken(symbol, SHORT, 300, 0, {"gas_price": gas_strategy})
+        for inverse in [LONG, SHORT]:
+            tx = pool.addCubeToken(symbol, inverse, 300, 0, 0, {"gas_price": gas_strategy})
+            cubeTokens[symbol, inverse] = tx.events["AddCubeToken"]["cubeToken"]
 
     print(f"Pool address: {pool.address}")
+    for (symbol, inverse), cubeToken in cubeTokens.items():
+        print(f"{'inv' if inverse else 'cube'}{symbol} address: {cubeToken}")
     print(f"Gas used in deployment: {(balance - deployer.balance()) / 1e18:.4f} ETH")
@@ -6,7 +6,10 @@ from brownie import (
     ZERO_ADDRESS,
 )
 from brownie.network.gas.strategies import GasNowScalingStrategy
-import time
+import os
+
+
+PUBLISH_SOURCE = os.environ.get("PUBLISH_SOURCE", "1") == "1"
 
 
 LONG = False
@@ -20,7 +23,7 @@ def main():
     gas_strategy = GasNowScalingStrategy()
 
     feeds = deployer.deploy(
-        ChainlinkFeedsRegistry, publish_source=True, gas_price=gas_strategy
+        ChainlinkFeedsRegistry, publish_source=PUBLISH_SOURCE, gas_price=gas_strategy
     )
 
     feeds.addEthFeed(
@@ -45,26 +48,24 @@ def main():
     )
 
     cubeTokenImpl = deployer.deploy(
-        CubeToken, publish_source=True, gas_price=gas_strategy
+        CubeToken, publish_source=PUBLISH_SOURCE, gas_price=gas_strategy
     )
     cubeTokenImpl.initialize(ZERO_ADDRESS, "", False, {"gas_price": gas_strategy})
 
     pool = deployer.deploy(
-        CubePool, feeds, cubeTokenImpl, publish_source=True, gas_price=gas_strategy
+        CubePool, feeds, cubeTokenImpl, publish_source=PUBLISH_SOURCE, gas_price=gas_strategy
     )
-    time.sleep(15)
 
     pool.setProtocolFee(2000, {"gas_price": gas_strategy})  # 20%
     pool.setMaxPoolBalance(100e18, {"gas_price": gas_strategy})  # 100 eth
 
-    pool.addCubeToken("BTC", LONG, 150, 100, 0, {"gas_price": gas_strategy})
-    pool.addCubeToken("BTC", SHORT, 150, 100, 0, {"gas_price": gas_strategy})
-    pool.addCubeToken("ETH", LONG, 150, 100, 0, {"gas_price": gas_strategy})
-    pool.addCubeToken("ETH", SHORT, 150, 100, 0, {"gas_price": gas_strategy})
-    pool.addCubeToken("LINK", LONG, 300, 100, 0, {"gas_price": gas_strategy})
-    pool.addCubeToken("LINK", SHORT, 300, 100, 0, {"gas_price": gas_strategy})
-    pool.addCubeToken("SNX", LONG, 300, 100, 0, {"gas_price": gas_strategy})
-    pool.addCubeToken("SNX", SHORT, 300, 100, 0, {"gas_price": gas_strategy})
+    cubeTokens = {}
+    for symbol, fee in [("BTC", 150), ("ETH", 150), ("LINK", 300), ("SNX", 300)]:
+        for inverse in [LONG, SHORT]:
+            tx = pool.addCubeToken(symbol, inverse, fee, 100, 0, {"gas_price": gas_strategy})
+            cubeTokens[symbol, inverse] = tx.events["AddCubeToken"]["cubeToken"]
 
     print(f"Pool address: {pool.address}")
+    for (symbol, inverse), cubeToken in cubeTokens.items():
+        print(f"{'inv' if inverse else 'cube'}{symbol} address: {cubeToken}")
     print(f"Gas used in deployment: {(balance - deployer.balance()) / 1e18:.4f} ETH")
@@ -1,11 +1,15 @@
 from brownie import CubePool, accounts
-from brownie.network.gas.strategies import GasNowScalingStrategy
 import os
 
 
-POOL = "0x23F6A2D8d691294c3A1144EeD14F5632e8bc1B67"
+# Can be overridden with the POOL and MAX_STALE_TIME environment variables
+POOL = os.environ.get("POOL", "0x23F6A2D8d691294c3A1144EeD14F5632e8bc1B67")
 
-MAX_STALE_TIME = 30 * 60
+MAX_STALE_TIME = int(os.environ.get("MAX_STALE_TIME", 30 * 60))
+
+# Transactions are priced with GasNow unless GAS_STRATEGY is set to something
+# else, in which case the network default is used
+USE_GAS_STRATEGY = os.environ.get("GAS_STRATEGY", "gasnow") == "gasnow"
 
 
 def getAccount(account, pw):
@@ -19,12 +23,16 @@ def main():
     keeper = getAccount(os.environ["KEEPER_ACCOUNT"], os.environ["KEEPER_PW"])
     # keeper = accounts.load(input("Brownie account: "))
 
-    gas_strategy = GasNowScalingStrategy()
+    txParams = {"from": keeper}
+    if USE_GAS_STRATEGY:
+        from brownie.network.gas.strategies import GasNowScalingStrategy
+
+        txParams["gas_price"] = GasNowScalingStrategy()
 
     balance = keeper.balance()
 
     pool = CubePool.at(POOL)
-    pool.updateAll(MAX_STALE_TIME, {"from": keeper, "gas_price": gas_strategy})
+    pool.updateAll(MAX_STALE_TIME, txParams)
 
     print(f"Gas used: {(balance - keeper.balance()) / 1e18:.4f} ETH")
     print(f"New balance: {keeper.balance() / 1e18:.4f} ETH")
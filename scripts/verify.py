@@ -0,0 +1,33 @@
+from brownie import (
+    ChainlinkFeedsRegistry,
+    CubePool,
+    CubePoolMulticall,
+    CubeToken,
+)
+from concurrent.futures import ThreadPoolExecutor
+
+
+CONTRACTS = {
+    "ChainlinkFeedsRegistry": ChainlinkFeedsRegistry,
+    "CubePool": CubePool,
+    "CubePoolMulticall": CubePoolMulticall,
+    "CubeToken": CubeToken,
+}
+
+
+def main():
+    # verify latest deployment of each contract. etherscan requests are slow
+    # so send them in parallel
+    deployed = {name: c[-1] for name, c in CONTRACTS.items() if len(c) > 0}
+    if not deployed:
+        print("No deployed contracts to verify")
+        return
+
+    with ThreadPoolExecutor(max_workers=len(deployed)) as executor:
+        results = {
+            name: executor.submit(CONTRACTS[name].publish_source, contract)
+            for name, contract in deployed.items()
+        }
+
+    for name, future in results.items():
+        print(f"{name} {deployed[name].address} verified: {future.result()}")
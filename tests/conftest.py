@@ -4,37 +4,70 @@ import pytest
 LONG, SHORT = False, True
 
 
-@pytest.fixture
+def toBytes32(s):
+    # same as ChainlinkFeedsRegistry.stringToBytes32 but computed locally
+    return "0x" + s.encode().hex().ljust(64, "0")
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--runslow", action="store_true", default=False, help="run slow tests"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: only run with --runslow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="need --runslow option to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+# contracts are deployed once per module and state is reverted after each
+# test. this also resets eth balances between tests
+@pytest.fixture(scope="module", autouse=True)
+def shared_setup(module_isolation):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+@pytest.fixture(scope="module")
 def gov(accounts):
     yield accounts[0]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def alice(accounts):
     yield accounts[1]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def bob(accounts):
     yield accounts[2]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def btcusd(gov, MockAggregatorV3Interface):
-    feed = gov.deploy(MockAggregatorV3Interface)
-    feed.setPrice(50000 * 1e8)
-    yield feed
+    yield gov.deploy(MockAggregatorV3Interface, 50000 * 1e8)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def feedsRegistry(gov, ChainlinkFeedsRegistry):
     yield gov.deploy(ChainlinkFeedsRegistry)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def poolEmpty(gov, feedsRegistry, CubeToken, CubePool, btcusd):
-    key = feedsRegistry.stringToBytes32("BTC")
-    feedsRegistry.addUsdFeed(key, btcusd)
+    feedsRegistry.addUsdFeed("BTC", btcusd)
 
     cubeTokenImpl = gov.deploy(CubeToken)
     yield gov.deploy(CubePool, feedsRegistry, cubeTokenImpl)
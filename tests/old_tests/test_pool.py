@@ -1,132 +1,225 @@
 from brownie import chain, reverts, ZERO_ADDRESS
-from collections import defaultdict
+from collections import namedtuple
+from conftest import toBytes32
 import pytest
 from pytest import approx
 
 
 LONG, SHORT = False, True
-FEE_INDEX = 6
-MAX_POOL_SHARE_INDEX = 8
-LAST_PRICE_INDEX = 10
-LAST_UPDATED_INDEX = 11
+
+# 1% fee is taken from the eth amount on deposit and on withdrawal. on deposit
+# it's charged on top of the net amount so is a little more than 1% of it
+DEPOSIT_FEE = 1.0 / 0.99 - 1.0
+WITHDRAW_FEE = 0.01
+
+# same fields and order as CubePool.CubeTokenParams
+Params = namedtuple(
+    "Params",
+    [
+        "currencyKey",
+        "inverse",
+        "depositPaused",
+        "withdrawPaused",
+        "updatePaused",
+        "added",
+        "depositWithdrawFee",
+        "maxFundingFee",
+        "maxPoolShare",
+        "initialSpotPrice",
+        "lastPrice",
+        "lastUpdated",
+    ],
+)
+
+BTC = toBytes32("BTC")
 
 
 class Sim(object):
     def __init__(self, protocolFee):
         self.protocolFee = protocolFee
-        self.quantities = defaultdict(int)
-        self.prices = defaultdict(int)
-        self.initialPrices = defaultdict(int)
         self.balance = 0
         self.poolBalance = 0
         self.accruedProtocolFees = 0
 
+        # per cube token state is stored in lists indexed by the id assigned in
+        # addCubeToken() so each call only hashes the cube token once
+        self._ids = {}
+        self.quantities = []
+        self.initialPrices = []
+
+        # price divided by initial price, which is what the pool stores as
+        # lastPrice. only changes in setPrice() so divide once there
+        self.ratios = []
+
+        # sum of quantity * price / initial price over all cube tokens. kept up
+        # to date on every trade and price change so it isn't recomputed
+        self._totalEquity = 0.0
+
+    def addCubeToken(self, symbol, price):
+        self._ids[symbol] = len(self._ids)
+        self.quantities.append(0)
+        self.initialPrices.append(price)
+        self.ratios.append(1.0)
+
+    def setPrice(self, symbol, price):
+        i = self._ids[symbol]
+        ratio = price / self.initialPrices[i]
+        self._totalEquity += self.quantities[i] * (ratio - self.ratios[i])
+        self.ratios[i] = ratio
+
+    # returns price normalized by initial price, as stored in pool params
+    def lastPrice(self, symbol):
+        i = self._ids[symbol]
+        return self.ratios[i] * 1e18
+
     # returns eth cost of deposit
     def deposit(self, symbol, quantity):
-        return self._trade(symbol, quantity, 1)
+        return self._trade(self._ids[symbol], quantity, 1, DEPOSIT_FEE)
 
     # returns eth amount returned from withdrawal
     def withdraw(self, symbol, quantity):
-        return self._trade(symbol, quantity, -1)
+        return self._trade(self._ids[symbol], quantity, -1, WITHDRAW_FEE)
 
-    def _trade(self, symbol, quantity, sign):
-        cost = quantity * self.price(symbol)
-        self.quantities[symbol] += sign * quantity
+    def _trade(self, i, quantity, sign, fee):
+        cost = quantity * self._price(i)
+        self.quantities[i] += sign * quantity
+        self._totalEquity += sign * quantity * self.ratios[i]
 
-        fee = 1.0 / 0.99 - 1.0 if sign == 1 else 0.01
-        fees = fee * cost * 1e18
-        self.balance += sign * cost * 1e18 + fees
-        self.poolBalance += sign * cost * 1e18 + (1.0 - self.protocolFee) * fees
+        ethAmount = cost * 1e18
+        fees = fee * ethAmount
+        protocolFees = self.protocolFee * fees
+        balanceChange = sign * ethAmount + fees
+        self.balance += balanceChange
+        self.poolBalance += balanceChange - protocolFees
 
-        self.accruedProtocolFees += self.protocolFee * fees
-        return cost * 1e18 + sign * fees
+        self.accruedProtocolFees += protocolFees
+        return ethAmount + sign * fees
 
     def price(self, symbol):
-        if self.totalEquity() > 0:
-            return (
-                self.prices[symbol]
-                * self.poolBalance
-                / self.initialPrices[symbol]
-                / self.totalEquity()
-                * 1e18
-            )
+        return self._price(self._ids[symbol])
+
+    def _price(self, i):
+        if self._totalEquity > 0:
+            return self.ratios[i] * self.poolBalance / self.totalEquity() * 1e18
         else:
             return 1.0
 
     def totalEquity(self):
-        tv = sum(
-            self.quantities[symbol] * self.prices[symbol] / self.initialPrices[symbol]
-            for symbol in self.quantities
-        )
-        return tv * 1e36
+        return self._totalEquity * 1e36
 
 
-def test_add_lt(
-    a,
-    CubePool,
-    CubeToken,
-    ChainlinkFeedsRegistry,
-    MockToken,
-    MockAggregatorV3Interface,
-):
-    deployer, alice = a[:2]
+def getParams(pool, cubeToken):
+    return Params(*pool.params(cubeToken))
+
+
+@pytest.fixture(scope="module")
+def poolMulticall(gov, CubePoolMulticall):
+    yield gov.deploy(CubePoolMulticall)
+
+
+# checks pool balances against the sim, reading them in a single call
+def assertMatchesSim(poolMulticall, pool, sim):
+    balance, poolBalance, totalEquity = poolMulticall.getPool(pool)
+    assert approx(balance) == sim.balance
+    assert approx(poolBalance) == sim.poolBalance
+    assert approx(totalEquity) == sim.totalEquity()
+
+
+# deposits qty cube tokens at the sim's cost and checks the pool matches the sim
+def depositAndCheck(poolMulticall, pool, sim, cubeToken, qty, sender, recipient):
+    qtyWei = qty * 1e18
+    assert approx(pool.quote(cubeToken)) == sim.price(cubeToken) * 1e18
+    cost = sim.deposit(cubeToken, qty)
+    assert approx(pool.quoteDeposit(cubeToken, cost)) == qtyWei
+
+    senderBalance = sender.balance()
+    poolBalance = pool.balance()
+    tx = pool.deposit(cubeToken, recipient, {"from": sender, "value": cost})
+    assert approx(tx.return_value) == qtyWei
+    assert approx(senderBalance - sender.balance()) == cost
+    assert approx(pool.balance() - poolBalance) == cost
+    assertMatchesSim(poolMulticall, pool, sim)
+
+    # check events
+    (ev,) = tx.events["DepositOrWithdraw"]
+    assert ev["cubeToken"] == cubeToken
+    assert ev["sender"] == sender
+    assert ev["recipient"] == recipient
+    assert ev["isDeposit"]
+    assert approx(ev["cubeTokenQuantity"]) == qtyWei
+    assert approx(ev["ethAmount"]) == cost
+    assert approx(ev["protocolFees"]) == sim.protocolFee * cost * 0.01
+
+    assert "Update" not in tx.events
+    return tx
+
 
-    # deploy pool
-    feedsRegistry = deployer.deploy(ChainlinkFeedsRegistry)
-    cubeTokenImpl = deployer.deploy(CubeToken)
-    pool = deployer.deploy(CubePool, feedsRegistry, cubeTokenImpl)
+# withdraws quantity cube tokens and checks the eth returned matches the sim.
+# returns the pool's eth balance before the withdrawal
+def withdrawAndCheck(pool, sim, cubeToken, quantity, sender, recipient):
+    price = sim.price(cubeToken) * 1e18
+    cost = sim.withdraw(cubeToken, quantity / 1e18)
+    assert approx(pool.quote(cubeToken)) == price
+    assert approx(pool.quoteWithdraw(cubeToken, quantity)) == cost
 
+    recipientBalance = recipient.balance()
+    poolBalance = pool.balance()
+    tx = pool.withdraw(cubeToken, quantity, recipient, {"from": sender})
+    assert approx(tx.return_value) == cost
+    assert approx(recipient.balance() - recipientBalance) == cost
+    assert approx(poolBalance - pool.balance()) == cost
+    assert approx(pool.balance()) == sim.balance
+
+    # check events
+    (ev,) = tx.events["DepositOrWithdraw"]
+    assert ev["cubeToken"] == cubeToken
+    assert ev["sender"] == sender
+    assert ev["recipient"] == recipient
+    assert not ev["isDeposit"]
+    assert approx(ev["cubeTokenQuantity"]) == quantity
+    assert approx(float(ev["ethAmount"])) == cost
+    assert approx(float(ev["protocolFees"])) == int(sim.protocolFee * cost / 99.0)
+
+    assert "Update" not in tx.events
+    return poolBalance
+
+
+def test_add_lt(poolEmpty, feedsRegistry, btcusd, alice, CubeToken):
     with reverts("!governance"):
-        pool.addCubeToken("BTC", LONG, 0, 0, 0, {"from": alice})
+        poolEmpty.addCubeToken("BTC", LONG, 0, 0, 0, {"from": alice})
 
+    # no feed has been added for this symbol
     with reverts("Spot price should be > 0"):
-        pool.addCubeToken("BTC", LONG, 0, 0, 0)
+        poolEmpty.addCubeToken("AAA", LONG, 0, 0, 0)
 
-    btcusd = deployer.deploy(MockAggregatorV3Interface)
-    btcusd.setPrice(50000 * 1e8)
-    BTC = feedsRegistry.stringToBytes32("BTC")
-    feedsRegistry.addUsdFeed(BTC, btcusd)
     assert feedsRegistry.getPrice(BTC) == 50000 * 1e8
 
     btcusd.setPrice(0)
     with reverts("Spot price should be > 0"):
-        pool.addCubeToken("BTC", LONG, 0, 0, 0)
+        poolEmpty.addCubeToken("BTC", LONG, 0, 0, 0)
 
     # add bull token
     btcusd.setPrice(50000 * 1e8)
-    tx = pool.addCubeToken("BTC", LONG, 100, 0, 2500)
+    tx = poolEmpty.addCubeToken("BTC", LONG, 100, 0, 2500)
 
     cubebtc = CubeToken.at(tx.return_value)
     assert cubebtc.name() == "3X Long BTC"
     assert cubebtc.symbol() == "cubeBTC"
-    assert pool.numCubeTokens() == 1
-    assert pool.cubeTokens(0) == cubebtc
-
-    (
-        currencyKey,
-        inverse,
-        depositPaused,
-        withdrawPaused,
-        updatePaused,
-        added,
-        depositWithdrawFee,
-        maxFundingFee,
-        maxPoolShare,
-        initialSpotPrice,
-        lastPrice,
-        lastUpdated,
-    ) = pool.params(cubebtc)
-    assert currencyKey == BTC
-    assert inverse == LONG
-    assert not depositPaused
-    assert not withdrawPaused
-    assert not updatePaused
-    assert added
-    assert depositWithdrawFee == 100
-    assert maxPoolShare == 2500
-    assert approx(initialSpotPrice) == 50000 * 1e8
-    assert lastPrice == 1e18
-    assert approx(lastUpdated, abs=3) == chain.time()
+    assert poolEmpty.numCubeTokens() == 1
+    assert poolEmpty.cubeTokens(0) == cubebtc
+
+    params = getParams(poolEmpty, cubebtc)
+    assert params.currencyKey == BTC
+    assert params.inverse == LONG
+    assert not params.depositPaused
+    assert not params.withdrawPaused
+    assert not params.updatePaused
+    assert params.added
+    assert params.depositWithdrawFee == 100
+    assert params.maxPoolShare == 2500
+    assert approx(params.initialSpotPrice) == 50000 * 1e8
+    assert params.lastPrice == 1e18
+    assert approx(params.lastUpdated, abs=3) == chain.time()
 
     # check event
     (ev,) = tx.events["AddCubeToken"]
@@ -139,39 +232,26 @@ def test_add_lt(
     assert approx(ev["price"]) == 1e18
 
     # add bear token
-    tx = pool.addCubeToken("BTC", SHORT, 200, 0, 5000)
+    tx = poolEmpty.addCubeToken("BTC", SHORT, 200, 0, 5000)
 
     invbtc = CubeToken.at(tx.return_value)
     assert invbtc.name() == "3X Short BTC"
     assert invbtc.symbol() == "invBTC"
-    assert pool.numCubeTokens() == 2
-    assert pool.cubeTokens(1) == invbtc
-
-    (
-        currencyKey,
-        inverse,
-        depositPaused,
-        withdrawPaused,
-        updatePaused,
-        added,
-        depositWithdrawFee,
-        maxFundingFee,
-        maxPoolShare,
-        initialSpotPrice,
-        lastPrice,
-        lastUpdated,
-    ) = pool.params(invbtc)
-    assert currencyKey == BTC
-    assert inverse == SHORT
-    assert not depositPaused
-    assert not withdrawPaused
-    assert not updatePaused
-    assert added
-    assert depositWithdrawFee == 200
-    assert maxPoolShare == 5000
-    assert approx(initialSpotPrice) == 50000 * 1e8
-    assert lastPrice == 1e18
-    assert approx(lastUpdated, abs=3) == chain.time()
+    assert poolEmpty.numCubeTokens() == 2
+    assert poolEmpty.cubeTokens(1) == invbtc
+
+    params = getParams(poolEmpty, invbtc)
+    assert params.currencyKey == BTC
+    assert params.inverse == SHORT
+    assert not params.depositPaused
+    assert not params.withdrawPaused
+    assert not params.updatePaused
+    assert params.added
+    assert params.depositWithdrawFee == 200
+    assert params.maxPoolShare == 5000
+    assert approx(params.initialSpotPrice) == 50000 * 1e8
+    assert params.lastPrice == 1e18
+    assert approx(params.lastUpdated, abs=3) == chain.time()
 
     # check event
     (ev,) = tx.events["AddCubeToken"]
@@ -183,469 +263,322 @@ def test_add_lt(
     assert ev["cubeToken"] == invbtc
     assert approx(ev["price"]) == 1e18
 
-    assert pool.numCubeTokens() == 2
-    assert pool.cubeTokens(0) == cubebtc
-    assert pool.cubeTokens(1) == invbtc
+    assert poolEmpty.numCubeTokens() == 2
+    assert poolEmpty.cubeTokens(0) == cubebtc
+    assert poolEmpty.cubeTokens(1) == invbtc
 
     with reverts("Already added"):
-        pool.addCubeToken("BTC", LONG, 0, 0, 0)
-
-    assert pool.poolBalance() == 0
-    assert pool.totalEquity() == 0
-
-
-@pytest.mark.parametrize("px1,px2", [(50000, 40000), (1e8, 1e7), (1, 1e1)])
-@pytest.mark.parametrize("qty", [1, 1e-5, 10])
-@pytest.mark.parametrize("protocolFee", [0, 0.2, 1])
+        poolEmpty.addCubeToken("BTC", LONG, 0, 0, 0)
+
+    assert poolEmpty.poolBalance() == 0
+    assert poolEmpty.totalEquity() == 0
+
+
+# full grid of prices, quantities and protocol fees
+ALL_CASES = [
+    (px1, px2, qty, protocolFee)
+    for px1, px2 in [(50000, 40000), (1e8, 1e7), (1, 1e1)]
+    for qty in [1, 1e-5, 10]
+    for protocolFee in [0, 0.2, 1]
+]
+
+# subset that covers every value above at least once. the rest of the grid is
+# only run with --runslow
+FAST_CASES = [
+    (50000, 40000, 1, 0.2),
+    (1e8, 1e7, 1e-5, 0),
+    (1, 1e1, 10, 1),
+    (50000, 40000, 1e-5, 1),
+]
+
+
+@pytest.mark.parametrize(
+    "px1,px2,qty,protocolFee",
+    [
+        case if case in FAST_CASES else pytest.param(*case, marks=pytest.mark.slow)
+        for case in ALL_CASES
+    ],
+)
 def test_deposit_and_withdraw(
-    a,
-    CubePool,
+    poolEmpty,
+    poolMulticall,
+    feedsRegistry,
+    btcusd,
+    alice,
+    bob,
     CubeToken,
-    ChainlinkFeedsRegistry,
-    MockToken,
-    MockAggregatorV3Interface,
     px1,
     px2,
     qty,
     protocolFee,
 ):
-    deployer, alice, bob = a[:3]
-
-    # deploy pool
-    feedsRegistry = deployer.deploy(ChainlinkFeedsRegistry)
-    cubeTokenImpl = deployer.deploy(CubeToken)
-    pool = deployer.deploy(CubePool, feedsRegistry, cubeTokenImpl)
-
-    btcusd = deployer.deploy(MockAggregatorV3Interface)
     btcusd.setPrice(px1 * 1e8)
-    BTC = feedsRegistry.stringToBytes32("BTC")
-    feedsRegistry.addUsdFeed(BTC, btcusd)
 
-    tx = pool.addCubeToken("BTC", LONG, 100, 0, 0)
+    tx = poolEmpty.addCubeToken("BTC", LONG, 100, 0, 0)
     cubebtc = CubeToken.at(tx.return_value)
 
-    tx = pool.addCubeToken("BTC", SHORT, 100, 0, 0)
-    invbtc = CubeToken.at(tx.return_value, 0, 0)
+    tx = poolEmpty.addCubeToken("BTC", SHORT, 100, 0, 0)
+    invbtc = CubeToken.at(tx.return_value)
 
-    pool.setProtocolFee(protocolFee * 1e4)
+    poolEmpty.setProtocolFee(protocolFee * 1e4)
 
     with reverts("Not added"):
-        pool.deposit(ZERO_ADDRESS, alice, {"from": bob, "value": 1e18})
+        poolEmpty.deposit(ZERO_ADDRESS, alice, {"from": bob, "value": 1e18})
     with reverts("Not added"):
-        pool.withdraw(ZERO_ADDRESS, 1e18, alice, {"from": bob})
+        poolEmpty.withdraw(ZERO_ADDRESS, 1e18, alice, {"from": bob})
 
     with reverts("msg.value should be > 0"):
-        pool.deposit(cubebtc, alice, {"from": bob})
+        poolEmpty.deposit(cubebtc, alice, {"from": bob})
     with reverts("cubeTokensIn should be > 0"):
-        pool.withdraw(cubebtc, 0, alice, {"from": bob})
+        poolEmpty.withdraw(cubebtc, 0, alice, {"from": bob})
 
     with reverts("Zero address"):
-        pool.deposit(cubebtc, ZERO_ADDRESS, {"from": bob, "value": 1e18})
+        poolEmpty.deposit(cubebtc, ZERO_ADDRESS, {"from": bob, "value": 1e18})
     with reverts("Zero address"):
-        pool.withdraw(cubebtc, 1e18, ZERO_ADDRESS, {"from": bob})
+        poolEmpty.withdraw(cubebtc, 1e18, ZERO_ADDRESS, {"from": bob})
 
     assert feedsRegistry.getPrice(BTC) == px1 * 1e8
 
-    sim = Sim(protocolFee)
-    sim.prices[cubebtc] = px1 ** 3
-    sim.prices[invbtc] = px1 ** -3
-    sim.initialPrices[cubebtc] = px1 ** 3
-    sim.initialPrices[invbtc] = px1 ** -3
+    # cube token prices before and after the oracle price move
+    px1Cubed, px2Cubed = px1 ** 3, px2 ** 3
+    qtyWei = qty * 1e18
 
-    # check btc bull token price
-    assert approx(pool.quote(cubebtc)) == sim.price(cubebtc) * 1e18
-    cost = sim.deposit(cubebtc, qty)
-    assert approx(pool.quoteDeposit(cubebtc, cost)) == qty * 1e18
+    sim = Sim(protocolFee)
+    sim.addCubeToken(cubebtc, px1Cubed)
+    sim.addCubeToken(invbtc, 1.0 / px1Cubed)
 
     # deposit 1 btc bull token
-    bobBalance = bob.balance()
-    poolBalance = pool.balance()
-    tx = pool.deposit(cubebtc, alice, {"from": bob, "value": cost})
-    assert approx(tx.return_value) == qty * 1e18
-    assert approx(bobBalance - bob.balance()) == cost
-    assert approx(pool.balance() - poolBalance) == cost
-    assert approx(cubebtc.balanceOf(alice)) == qty * 1e18
-    assert approx(pool.balance()) == sim.balance
-    assert approx(pool.poolBalance()) == sim.poolBalance
-    assert approx(pool.totalEquity()) == sim.totalEquity()
-    assert approx(pool.params(cubebtc)[LAST_PRICE_INDEX]) == 1e18
-    assert approx(pool.params(cubebtc)[LAST_UPDATED_INDEX], abs=3) == chain.time()
+    depositAndCheck(poolMulticall, poolEmpty, sim, cubebtc, qty, bob, alice)
+    assert approx(cubebtc.balanceOf(alice)) == qtyWei
+    params = getParams(poolEmpty, cubebtc)
+    assert approx(params.lastPrice) == 1e18
+    assert approx(params.lastUpdated, abs=3) == chain.time()
     update_time = chain.time()
     chain.sleep(1)
 
-    # check events
-    (ev,) = tx.events["DepositOrWithdraw"]
-    assert ev["cubeToken"] == cubebtc
-    assert ev["sender"] == bob
-    assert ev["recipient"] == alice
-    assert ev["isDeposit"]
-    assert approx(ev["cubeTokenQuantity"]) == qty * 1e18
-    assert approx(ev["ethAmount"]) == cost
-    assert approx(ev["protocolFees"]) == protocolFee * cost * 0.01
-
-    assert "Update" not in tx.events
-
     # pause price updates and change oracle price, which shouldn't be reflected
     # until later
-    pool.setPaused(invbtc, False, False, True)
+    poolEmpty.setPaused(invbtc, False, False, True)
     btcusd.setPrice(px2 * 1e8)
     assert feedsRegistry.getPrice(BTC) == px2 * 1e8
-    assert approx(pool.balance()) == sim.balance
-    assert approx(pool.poolBalance()) == sim.poolBalance
-    assert approx(pool.totalEquity()) == sim.totalEquity()
-
-    # check btc bear token price
-    assert approx(pool.quote(invbtc)) == sim.price(invbtc) * 1e18
-    cost = sim.deposit(invbtc, qty)
-    assert approx(pool.quoteDeposit(invbtc, cost)) == qty * 1e18
+    assertMatchesSim(poolMulticall, poolEmpty, sim)
 
     # deposit 1 btc bear token
-    bobBalance = bob.balance()
-    poolBalance = pool.balance()
-    tx = pool.deposit(invbtc, alice, {"from": bob, "value": cost})
-    assert approx(tx.return_value) == qty * 1e18
-    assert approx(bobBalance - bob.balance()) == cost
-    assert approx(pool.balance() - poolBalance) == cost
-    assert approx(invbtc.balanceOf(alice)) == qty * 1e18
-    assert approx(pool.balance()) == sim.balance
-    assert approx(pool.poolBalance()) == sim.poolBalance
-    assert approx(pool.totalEquity()) == sim.totalEquity()
-    assert approx(pool.params(invbtc)[LAST_PRICE_INDEX]) == 1e18
+    depositAndCheck(poolMulticall, poolEmpty, sim, invbtc, qty, bob, alice)
+    assert approx(invbtc.balanceOf(alice)) == qtyWei
+    params = getParams(poolEmpty, invbtc)
+    assert approx(params.lastPrice) == 1e18
     assert (
-        approx(pool.params(invbtc)[LAST_UPDATED_INDEX], abs=3)
+        approx(params.lastUpdated, abs=3)
         == update_time
         < chain.time()
     )
 
-    # check events
-    (ev,) = tx.events["DepositOrWithdraw"]
-    assert ev["cubeToken"] == invbtc
-    assert ev["sender"] == bob
-    assert ev["recipient"] == alice
-    assert ev["isDeposit"]
-    assert approx(ev["cubeTokenQuantity"]) == qty * 1e18
-    assert approx(ev["ethAmount"]) == cost
-    assert approx(ev["protocolFees"]) == protocolFee * cost * 0.01
-
-    assert "Update" not in tx.events
-
     # unpause price updates
-    pool.setPaused(invbtc, False, False, False)
+    poolEmpty.setPaused(invbtc, False, False, False)
 
-    # update btc bull price
-    tx = pool.update(cubebtc)
-    sim.prices[cubebtc] = px2 ** 3
-    assert approx(pool.balance()) == sim.balance
-    assert approx(pool.poolBalance()) == sim.poolBalance
-    assert approx(pool.totalEquity()) == sim.totalEquity()
+    # update btc bull and bear prices
+    for cubeToken, price in [(cubebtc, px2Cubed), (invbtc, 1.0 / px2Cubed)]:
+        tx = poolEmpty.update(cubeToken)
+        sim.setPrice(cubeToken, price)
+        assertMatchesSim(poolMulticall, poolEmpty, sim)
 
-    (ev,) = tx.events["Update"]
-    assert ev["cubeToken"] == cubebtc
-    assert (
-        approx(ev["price"]) == sim.prices[cubebtc] / sim.initialPrices[cubebtc] * 1e18
-    )
-
-    # update btc bear price
-    tx = pool.update(invbtc)
-    sim.prices[invbtc] = px2 ** -3
-    assert approx(pool.balance()) == sim.balance
-    assert approx(pool.poolBalance()) == sim.poolBalance
-    assert approx(pool.totalEquity()) == sim.totalEquity()
-
-    (ev,) = tx.events["Update"]
-    assert ev["cubeToken"] == invbtc
-    assert approx(ev["price"]) == sim.prices[invbtc] / sim.initialPrices[invbtc] * 1e18
-
-    # check btc bull token price
-    assert approx(pool.quote(cubebtc)) == sim.price(cubebtc) * 1e18
-    cost = sim.deposit(cubebtc, qty)
-    assert approx(pool.quoteDeposit(cubebtc, cost)) == qty * 1e18
+        (ev,) = tx.events["Update"]
+        assert ev["cubeToken"] == cubeToken
+        assert approx(ev["price"]) == sim.lastPrice(cubeToken)
 
     # deposit 1 btc bull token
-    bobBalance = bob.balance()
-    poolBalance = pool.balance()
-    tx = pool.deposit(cubebtc, alice, {"from": bob, "value": cost})
-    assert approx(tx.return_value) == qty * 1e18
-    assert approx(bobBalance - bob.balance()) == cost
-    assert approx(pool.balance() - poolBalance) == cost
-    assert approx(cubebtc.balanceOf(alice)) == 2 * qty * 1e18
-    assert approx(pool.balance()) == sim.balance
-    assert approx(pool.poolBalance()) == sim.poolBalance
-    assert approx(pool.totalEquity()) == sim.totalEquity()
-    assert (
-        approx(pool.params(cubebtc)[LAST_PRICE_INDEX])
-        == sim.prices[cubebtc] / sim.initialPrices[cubebtc] * 1e18
-    )
-    assert approx(pool.params(cubebtc)[LAST_UPDATED_INDEX], abs=3) == chain.time()
-
-    # check events
-    (ev,) = tx.events["DepositOrWithdraw"]
-    assert ev["cubeToken"] == cubebtc
-    assert ev["sender"] == bob
-    assert ev["recipient"] == alice
-    assert ev["isDeposit"]
-    assert approx(ev["cubeTokenQuantity"]) == qty * 1e18
-    assert approx(ev["ethAmount"]) == cost
-    assert approx(ev["protocolFees"]) == protocolFee * cost * 0.01
-
-    assert "Update" not in tx.events
-
-    # check btc bull token price
-    assert approx(pool.quote(cubebtc)) == sim.price(cubebtc) * 1e18
-    quantity = cubebtc.balanceOf(alice)
-    cost = sim.withdraw(cubebtc, quantity / 1e18)
-    assert approx(pool.quoteWithdraw(cubebtc, quantity)) == cost
+    depositAndCheck(poolMulticall, poolEmpty, sim, cubebtc, qty, bob, alice)
+    assert approx(cubebtc.balanceOf(alice)) == 2 * qtyWei
+    params = getParams(poolEmpty, cubebtc)
+    assert approx(params.lastPrice) == sim.lastPrice(cubebtc)
+    assert approx(params.lastUpdated, abs=3) == chain.time()
 
     # withdraw 2 btc bull token
-    bobBalance = bob.balance()
-    poolBalance = pool.balance()
-    tx = pool.withdraw(cubebtc, quantity, bob, {"from": alice})
-    assert approx(tx.return_value) == cost
-    assert approx(bob.balance() - bobBalance) == cost
-    assert approx(poolBalance - pool.balance()) == cost
+    quantity = cubebtc.balanceOf(alice)
+    poolBalance = withdrawAndCheck(poolEmpty, sim, cubebtc, quantity, alice, bob)
     assert approx(cubebtc.balanceOf(alice)) == 0
-    assert approx(pool.balance()) == sim.balance
     assert (
-        approx(pool.poolBalance() / poolBalance) == sim.poolBalance / poolBalance
+        approx(poolEmpty.poolBalance() / poolBalance) == sim.poolBalance / poolBalance
     )  # divide by prev to fix rounding
-    assert approx(pool.totalEquity()) == sim.totalEquity()
-    assert (
-        approx(pool.params(cubebtc)[LAST_PRICE_INDEX])
-        == sim.prices[cubebtc] / sim.initialPrices[cubebtc] * 1e18
-    )
-    assert approx(pool.params(cubebtc)[LAST_UPDATED_INDEX], abs=3) == chain.time()
-
-    # check events
-    (ev,) = tx.events["DepositOrWithdraw"]
-    assert ev["cubeToken"] == cubebtc
-    assert ev["sender"] == alice
-    assert ev["recipient"] == bob
-    assert not ev["isDeposit"]
-    assert approx(ev["cubeTokenQuantity"]) == quantity
-    assert approx(float(ev["ethAmount"])) == cost
-    assert approx(float(ev["protocolFees"])) == int(protocolFee * cost / 99.0)
-
-    assert "Update" not in tx.events
+    assert approx(poolEmpty.totalEquity()) == sim.totalEquity()
+    params = getParams(poolEmpty, cubebtc)
+    assert approx(params.lastPrice) == sim.lastPrice(cubebtc)
+    assert approx(params.lastUpdated, abs=3) == chain.time()
 
     # can't withdraw all
     quantity = invbtc.balanceOf(alice)
     with reverts("Min total equity exceeded"):
-        pool.withdraw(invbtc, quantity, bob, {"from": alice})
-
-    # check btc bear token price
-    quantity = invbtc.balanceOf(alice)
-    px = sim.price(invbtc) * 1e18
-    cost = sim.withdraw(invbtc, 0.9 * quantity / 1e18)
-    assert approx(pool.quoteWithdraw(invbtc, 0.9 * quantity)) == cost
-    assert approx(pool.quote(invbtc)) == px
+        poolEmpty.withdraw(invbtc, quantity, bob, {"from": alice})
 
-    # withdraw 1 btc bear token
-    bobBalance = bob.balance()
-    poolBalance = pool.balance()
-    tx = pool.withdraw(invbtc, 0.9 * quantity, bob, {"from": alice})
-    assert approx(tx.return_value) == cost
-    assert approx(bob.balance() - bobBalance) == cost
-    assert approx(poolBalance - pool.balance()) == cost
+    # withdraw 90% of btc bear tokens
+    poolBalance = withdrawAndCheck(poolEmpty, sim, invbtc, 0.9 * quantity, alice, bob)
     assert approx(invbtc.balanceOf(alice)) == 0.1 * quantity
-    assert approx(pool.balance()) == sim.balance
     assert (
-        approx(pool.poolBalance() / poolBalance, rel=1e-4)
+        approx(poolEmpty.poolBalance() / poolBalance, rel=1e-4)
         == sim.poolBalance / poolBalance
     )  # divide by prev to fix rounding
-    assert approx(pool.totalEquity(), rel=1e-5) == sim.totalEquity()
-    assert (
-        approx(pool.params(invbtc)[LAST_PRICE_INDEX])
-        == sim.prices[invbtc] / sim.initialPrices[invbtc] * 1e18
-    )
-    assert approx(pool.params(invbtc)[LAST_UPDATED_INDEX], abs=3) == chain.time()
-
-    # check events
-    (ev,) = tx.events["DepositOrWithdraw"]
-    assert ev["cubeToken"] == invbtc
-    assert ev["sender"] == alice
-    assert ev["recipient"] == bob
-    assert not ev["isDeposit"]
-    assert approx(ev["cubeTokenQuantity"]) == 0.9 * quantity
-    assert approx(float(ev["ethAmount"])) == cost
-    assert approx(float(ev["protocolFees"])) == int(protocolFee * cost / 99.0)
+    assert approx(poolEmpty.totalEquity(), rel=1e-5) == sim.totalEquity()
+    params = getParams(poolEmpty, invbtc)
+    assert approx(params.lastPrice) == sim.lastPrice(invbtc)
+    assert approx(params.lastUpdated, abs=3) == chain.time()
 
-    assert "Update" not in tx.events
-
-
-def test_governance_methods(
-    a,
-    CubePool,
-    CubeToken,
-    ChainlinkFeedsRegistry,
-    MockToken,
-    MockAggregatorV3Interface,
-):
-    deployer, alice, bob = a[:3]
-
-    # deploy pool
-    feedsRegistry = deployer.deploy(ChainlinkFeedsRegistry)
-    cubeTokenImpl = deployer.deploy(CubeToken)
-    pool = deployer.deploy(CubePool, feedsRegistry, cubeTokenImpl)
-
-    btcusd = deployer.deploy(MockAggregatorV3Interface)
-    btcusd.setPrice(50000 * 1e8)
-    BTC = feedsRegistry.stringToBytes32("BTC")
-    feedsRegistry.addUsdFeed(BTC, btcusd)
 
-    tx = pool.addCubeToken(BTC, LONG, 0, 0, 0)
+def test_governance_methods(poolEmpty, btcusd, gov, alice, bob, CubeToken):
+    tx = poolEmpty.addCubeToken("BTC", LONG, 0, 0, 0)
     cubebtc = CubeToken.at(tx.return_value)
 
-    tx = pool.addCubeToken(BTC, SHORT, 0, 0, 0)
+    tx = poolEmpty.addCubeToken("BTC", SHORT, 0, 0, 0)
     invbtc = CubeToken.at(tx.return_value)
 
     # set fee
     with reverts("!governance"):
-        pool.setDepositWithdrawFee(cubebtc, 100, {"from": alice})
+        poolEmpty.setDepositWithdrawFee(cubebtc, 100, {"from": alice})
 
-    assert pool.params(cubebtc)[FEE_INDEX] == 0
-    pool.setDepositWithdrawFee(cubebtc, 100)  # 1%
-    assert pool.params(cubebtc)[FEE_INDEX] == 100
+    assert getParams(poolEmpty, cubebtc).depositWithdrawFee == 0
+    poolEmpty.setDepositWithdrawFee(cubebtc, 100)  # 1%
+    assert getParams(poolEmpty, cubebtc).depositWithdrawFee == 100
 
-    pool.setDepositWithdrawFee(cubebtc, 0)
-    assert pool.params(cubebtc)[FEE_INDEX] == 0
+    poolEmpty.setDepositWithdrawFee(cubebtc, 0)
+    assert getParams(poolEmpty, cubebtc).depositWithdrawFee == 0
 
-    pool.setDepositWithdrawFee(cubebtc, 100)  # 1%
-    assert pool.params(cubebtc)[FEE_INDEX] == 100
+    poolEmpty.setDepositWithdrawFee(cubebtc, 100)  # 1%
+    assert getParams(poolEmpty, cubebtc).depositWithdrawFee == 100
 
     with reverts("Fee should be < 100%"):
-        pool.setDepositWithdrawFee(cubebtc, 1e4)
+        poolEmpty.setDepositWithdrawFee(cubebtc, 1e4)
 
-    pool.setDepositWithdrawFee(invbtc, 100)  # 1%
+    poolEmpty.setDepositWithdrawFee(invbtc, 100)  # 1%
 
     # set protocol fee
     with reverts("!governance"):
-        pool.setProtocolFee(2000, {"from": alice})
+        poolEmpty.setProtocolFee(2000, {"from": alice})
 
-    assert pool.protocolFee() == 0
-    pool.setProtocolFee(2000)  # 20%
-    assert pool.protocolFee() == 2000
+    assert poolEmpty.protocolFee() == 0
+    poolEmpty.setProtocolFee(2000)  # 20%
+    assert poolEmpty.protocolFee() == 2000
 
     # set max tvl
     with reverts("!governance"):
-        pool.setMaxPoolBalance(1e18, {"from": alice})
+        poolEmpty.setMaxPoolBalance(1e18, {"from": alice})
 
-    assert pool.maxPoolBalance() == 0
-    pool.setMaxPoolBalance(2e18)
-    assert pool.maxPoolBalance() == 2e18
+    assert poolEmpty.maxPoolBalance() == 0
+    poolEmpty.setMaxPoolBalance(2e18)
+    assert poolEmpty.maxPoolBalance() == 2e18
 
-    with reverts("Max pool balance exceeded"):
-        pool.deposit(cubebtc, alice, {"from": alice, "value": 2.03e18})
+    with reverts("Max poolEmpty balance exceeded"):
+        poolEmpty.deposit(cubebtc, alice, {"from": alice, "value": 2.03e18})
 
-    pool.deposit(cubebtc, alice, {"from": alice, "value": 2e18})
+    poolEmpty.deposit(cubebtc, alice, {"from": alice, "value": 2e18})
 
-    pool.setMaxPoolBalance(0)
-    assert pool.maxPoolBalance() == 0
+    poolEmpty.setMaxPoolBalance(0)
+    assert poolEmpty.maxPoolBalance() == 0
 
-    pool.deposit(cubebtc, alice, {"from": alice, "value": 1e18})
+    poolEmpty.deposit(cubebtc, alice, {"from": alice, "value": 1e18})
 
-    # set max pool share
-    pool.setMaxPoolShare(invbtc, 5000)  # 50%
-    assert pool.params(invbtc)[MAX_POOL_SHARE_INDEX] == 5000
+    # set max poolEmpty share
+    poolEmpty.setMaxPoolShare(invbtc, 5000)  # 50%
+    assert getParams(poolEmpty, invbtc).maxPoolShare == 5000
 
-    with reverts("Max pool share exceeded"):
-        pool.deposit(invbtc, alice, {"from": alice, "value": 3.04e18})
+    with reverts("Max poolEmpty share exceeded"):
+        poolEmpty.deposit(invbtc, alice, {"from": alice, "value": 3.04e18})
 
-    pool.deposit(invbtc, alice, {"from": alice, "value": 3e18})
+    poolEmpty.deposit(invbtc, alice, {"from": alice, "value": 3e18})
 
-    pool.setMaxPoolShare(invbtc, 0)
-    assert pool.params(invbtc)[MAX_POOL_SHARE_INDEX] == 0
+    poolEmpty.setMaxPoolShare(invbtc, 0)
+    assert getParams(poolEmpty, invbtc).maxPoolShare == 0
 
-    pool.deposit(invbtc, alice, {"from": alice, "value": 1e18})
+    poolEmpty.deposit(invbtc, alice, {"from": alice, "value": 1e18})
 
     # collect fees
-    assert pool.accruedProtocolFees() == 0.2 * 7e16
+    assert poolEmpty.accruedProtocolFees() == 0.2 * 7e16
 
     with reverts("!governance"):
-        pool.collectProtocolFees({"from": alice})
+        poolEmpty.collectProtocolFees({"from": alice})
 
-    balance = deployer.balance()
-    pool.collectProtocolFees()
-    assert deployer.balance() - balance == 0.2 * 7e16
-    assert pool.accruedProtocolFees() == 0
+    balance = gov.balance()
+    poolEmpty.collectProtocolFees()
+    assert gov.balance() - balance == 0.2 * 7e16
+    assert poolEmpty.accruedProtocolFees() == 0
 
     # pause deposit
     with reverts("!governance and !guardian"):
-        pool.setPaused(cubebtc, True, False, False, {"from": alice})
+        poolEmpty.setPaused(cubebtc, True, False, False, {"from": alice})
 
-    pool.setPaused(cubebtc, True, False, False)
+    poolEmpty.setPaused(cubebtc, True, False, False)
 
     with reverts("Paused"):
-        pool.deposit(cubebtc, alice, {"from": alice, "value": 1e18})
-    pool.deposit(invbtc, alice, {"from": alice, "value": 1e18})
+        poolEmpty.deposit(cubebtc, alice, {"from": alice, "value": 1e18})
+    poolEmpty.deposit(invbtc, alice, {"from": alice, "value": 1e18})
 
-    pool.setPaused(cubebtc, False, False, False)
-    pool.deposit(cubebtc, alice, {"from": alice, "value": 1e18})
+    poolEmpty.setPaused(cubebtc, False, False, False)
+    poolEmpty.deposit(cubebtc, alice, {"from": alice, "value": 1e18})
 
     # pause withdraw
     with reverts("!governance and !guardian"):
-        pool.setPaused(cubebtc, False, True, False, {"from": alice})
+        poolEmpty.setPaused(cubebtc, False, True, False, {"from": alice})
 
-    pool.setPaused(cubebtc, False, True, False)
+    poolEmpty.setPaused(cubebtc, False, True, False)
 
     with reverts("Paused"):
-        pool.withdraw(cubebtc, 1e18, alice, {"from": alice})
-    pool.withdraw(invbtc, 1e18, alice, {"from": alice})
+        poolEmpty.withdraw(cubebtc, 1e18, alice, {"from": alice})
+    poolEmpty.withdraw(invbtc, 1e18, alice, {"from": alice})
 
-    pool.setPaused(cubebtc, False, False, False)
-    pool.withdraw(cubebtc, 1e18, alice, {"from": alice})
+    poolEmpty.setPaused(cubebtc, False, False, False)
+    poolEmpty.withdraw(cubebtc, 1e18, alice, {"from": alice})
 
     # pause price set
     with reverts("!governance and !guardian"):
-        pool.setPaused(cubebtc, False, False, True, {"from": alice})
+        poolEmpty.setPaused(cubebtc, False, False, True, {"from": alice})
 
-    pool.setPaused(cubebtc, False, False, True)
+    poolEmpty.setPaused(cubebtc, False, False, True)
 
     # doesn't update because paused
-    t = pool.params(cubebtc)[LAST_UPDATED_INDEX]
+    t = getParams(poolEmpty, cubebtc).lastUpdated
     chain.sleep(1)
-    pool.update(cubebtc, {"from": alice})
-    assert pool.params(cubebtc)[LAST_UPDATED_INDEX] == t
+    poolEmpty.update(cubebtc, {"from": alice})
+    assert getParams(poolEmpty, cubebtc).lastUpdated == t
 
     # doesn't update because no price change
-    t = pool.params(invbtc)[LAST_UPDATED_INDEX]
+    t = getParams(poolEmpty, invbtc).lastUpdated
     chain.sleep(1)
-    pool.update(invbtc, {"from": alice})
-    assert pool.params(invbtc)[LAST_UPDATED_INDEX] == t
+    poolEmpty.update(invbtc, {"from": alice})
+    assert getParams(poolEmpty, invbtc).lastUpdated == t
 
+    # t is still the last updated time since the poolEmpty hasn't changed
     btcusd.setPrice(60000 * 1e8)
-    t = pool.params(invbtc)[LAST_UPDATED_INDEX]
     chain.sleep(1)
-    pool.update(invbtc, {"from": alice})
-    assert pool.params(invbtc)[LAST_UPDATED_INDEX] > t
+    poolEmpty.update(invbtc, {"from": alice})
+    assert getParams(poolEmpty, invbtc).lastUpdated > t
 
     # unpause
-    pool.setPaused(cubebtc, False, False, False)
+    poolEmpty.setPaused(cubebtc, False, False, False)
 
-    t = pool.params(cubebtc)[LAST_UPDATED_INDEX]
+    t = getParams(poolEmpty, cubebtc).lastUpdated
     chain.sleep(1)
-    pool.update(cubebtc, {"from": alice})
-    assert pool.params(cubebtc)[LAST_UPDATED_INDEX] > t
+    poolEmpty.update(cubebtc, {"from": alice})
+    assert getParams(poolEmpty, cubebtc).lastUpdated > t
 
     # add guardian
-    assert pool.guardian() == ZERO_ADDRESS
+    assert poolEmpty.guardian() == ZERO_ADDRESS
     with reverts("!governance"):
-        pool.setGuardian(alice, {"from": alice})
-    pool.setGuardian(alice)
-    assert pool.guardian() == alice
+        poolEmpty.setGuardian(alice, {"from": alice})
+    poolEmpty.setGuardian(alice)
+    assert poolEmpty.guardian() == alice
 
-    pool.setPaused(cubebtc, True, True, True, {"from": alice})
-    pool.setPaused(cubebtc, False, False, False, {"from": alice})
+    poolEmpty.setPaused(cubebtc, True, True, True, {"from": alice})
+    poolEmpty.setPaused(cubebtc, False, False, False, {"from": alice})
 
-    balance = pool.poolBalance()
-    alice.transfer(pool, 1e18)
-    assert pool.poolBalance() - balance == 1e18
+    balance = poolEmpty.poolBalance()
+    alice.transfer(poolEmpty, 1e18)
+    assert poolEmpty.poolBalance() - balance == 1e18
 
     with reverts("!governance"):
-        pool.setGovernance(alice, {"from": alice})
-    pool.setGovernance(alice)
-    assert pool.governance() == deployer
+        poolEmpty.setGovernance(alice, {"from": alice})
+    poolEmpty.setGovernance(alice)
+    assert poolEmpty.governance() == gov
 
     with reverts("!pendingGovernance"):
-        pool.acceptGovernance({"from": bob})
-    pool.acceptGovernance({"from": alice})
-    assert pool.governance() == alice
+        poolEmpty.acceptGovernance({"from": bob})
+    poolEmpty.acceptGovernance({"from": alice})
+    assert poolEmpty.governance() == alice
@@ -1,10 +1,13 @@
 from brownie import chain, reverts, ZERO_ADDRESS
+from conftest import toBytes32
 import pytest
 from pytest import approx
 
 
 LONG, SHORT = False, True
 
+BTC = toBytes32("BTC")
+
 
 def test_cannot_add_if_not_gov(poolEmpty, alice):
     with reverts("!governance"):
@@ -19,8 +22,10 @@ def test_cannot_add_if_price_zero(poolEmpty, gov, btcusd):
 
 def test_add(poolEmpty, gov, feedsRegistry, CubeToken):
     # add cubeBTC
+    predicted = poolEmpty.predictCubeTokenAddress("BTC", LONG)
     tx = poolEmpty.addCubeToken("BTC", LONG, 150, 100, 2500)
     cubebtc = CubeToken.at(tx.return_value)
+    assert cubebtc == predicted
     assert cubebtc.name() == "3X Long BTC"
     assert cubebtc.symbol() == "cubeBTC"
     assert poolEmpty.numCubeTokens() == 1
@@ -33,8 +38,10 @@ def test_add(poolEmpty, gov, feedsRegistry, CubeToken):
     assert not ev["inverse"]
 
     # add invBTC
+    predicted = poolEmpty.predictCubeTokenAddress("BTC", SHORT)
     tx = poolEmpty.addCubeToken("BTC", SHORT, 150, 100, 2500)
     cubebtc = CubeToken.at(tx.return_value)
+    assert cubebtc == predicted
     assert cubebtc.name() == "3X Short BTC"
     assert cubebtc.symbol() == "invBTC"
     assert poolEmpty.numCubeTokens() == 2
@@ -53,7 +60,7 @@ def test_cannot_add_again(poolEmpty, gov):
         poolEmpty.addCubeToken("BTC", LONG, 150, 100, 2500)
 
 
-def test_params(poolEmpty, gov, feedsRegistry):
+def test_params(poolEmpty, gov):
     # add two cube tokens
     t = chain.time()
     poolEmpty.addCubeToken("BTC", LONG, 150, 100, 2500)
@@ -62,32 +69,17 @@ def test_params(poolEmpty, gov, feedsRegistry):
     # fast-forward time
     chain.sleep(3600)
 
-    # check params
+    # check params. only initial spot price and last updated are approximate
+    expected = [
+        (BTC, inverse, False, False, False, True, 150, 100, 2500)
+        for inverse in [LONG, SHORT]
+    ]
     for i in range(2):
-        (
-            currencyKey,
-            inverse,
-            depositPaused,
-            withdrawPaused,
-            updatePaused,
-            added,
-            depositWithdrawFee,
-            maxFundingFee,
-            maxPoolShare,
-            initialSpotPrice,
-            lastPrice,
-            lastUpdated,
-        ) = poolEmpty.params(poolEmpty.cubeTokens(i))
-        assert currencyKey == feedsRegistry.stringToBytes32("BTC")
-        assert inverse == [LONG, SHORT][i]
-        assert not depositPaused
-        assert not withdrawPaused
-        assert not updatePaused
-        assert added
-        assert depositWithdrawFee == 150
-        assert maxFundingFee == 100
-        assert maxPoolShare == 2500
-        assert approx(initialSpotPrice) == 50000 * 1e8
+        params = poolEmpty.params(poolEmpty.cubeTokens(i))
+        assert params[:9] == expected[i]
+
+        initialSpotPrice, lastPrice, lastUpdated = params[9:]
+        assert approx(initialSpotPrice, rel=1e-12) == 50000 * 1e8
         assert lastPrice == 1e18
         assert approx(lastUpdated, abs=10) == t
 
@@ -11,20 +11,15 @@ LAST_PRICE_INDEX = 10
 LAST_UPDATED_INDEX = 11
 
 
-# needed to reset eth balances between tests
-@pytest.fixture(scope="function", autouse=True)
-def isolate(fn_isolation):
-    pass
-
-
-def test_cannot_deposit_before_add(poolEmpty, gov, alice, CubeToken):
+# "Not added" is checked before the cube token is called so any address works
+def test_cannot_deposit_before_add(poolEmpty, alice):
     with reverts("Not added"):
-        poolEmpty.deposit(gov.deploy(CubeToken), alice, {"value": "1 ether"})
+        poolEmpty.deposit(ZERO_ADDRESS, alice, {"value": "1 ether"})
 
 
-def test_cannot_withdraw_before_add(poolEmpty, gov, alice, CubeToken):
+def test_cannot_withdraw_before_add(poolEmpty, alice):
     with reverts("Not added"):
-        poolEmpty.withdraw(gov.deploy(CubeToken), "1 ether", alice)
+        poolEmpty.withdraw(ZERO_ADDRESS, "1 ether", alice)
 
 
 def test_cannot_deposit_if_msg_value_zero(pool, alice, cubebtc):
@@ -177,15 +172,13 @@ def test_price_move(pool, alice, cubebtc, invbtc, btcusd):
     pool.deposit(cubebtc, alice, {"from": alice, "value": "5 ether"})
     pool.deposit(invbtc, alice, {"from": alice, "value": "15 ether"})
 
-    pool.update(cubebtc, {"from": alice})
-    pool.update(invbtc, {"from": alice})
+    pool.updateAll(0, {"from": alice})
 
     px1 = pool.params(cubebtc)[LAST_PRICE_INDEX]
     px2 = pool.params(invbtc)[LAST_PRICE_INDEX]
 
     btcusd.setPrice(60000 * 1e8)
-    pool.update(cubebtc, {"from": alice})
-    pool.update(invbtc, {"from": alice})
+    pool.updateAll(0, {"from": alice})
 
     assert approx(pool.params(cubebtc)[LAST_PRICE_INDEX], rel=0.001) == px1 * 1.2 ** 3
     assert approx(pool.params(invbtc)[LAST_PRICE_INDEX], rel=0.001) == px1 / 1.2 ** 3
@@ -195,16 +188,44 @@ def test_funding(pool, alice, cubebtc, invbtc):
     pool.deposit(cubebtc, alice, {"from": alice, "value": "5 ether"})
     pool.deposit(invbtc, alice, {"from": alice, "value": "15 ether"})
 
-    pool.update(cubebtc, {"from": alice})
-    pool.update(invbtc, {"from": alice})
+    pool.updateAll(0, {"from": alice})
 
     px1 = pool.params(cubebtc)[LAST_PRICE_INDEX]
     px2 = pool.params(invbtc)[LAST_PRICE_INDEX]
 
     # fast-forward 2 days
     chain.sleep(2 * 24 * 60 * 60)
-    pool.update(cubebtc, {"from": alice})
-    pool.update(invbtc, {"from": alice})
+    pool.updateAll(0, {"from": alice})
 
     assert approx(pool.params(cubebtc)[LAST_PRICE_INDEX], rel=0.001) == px1 * (1.0 - 2 * 0.01 * 0.25)
     assert approx(pool.params(invbtc)[LAST_PRICE_INDEX], rel=0.001) == px1 * (1.0 - 2 * 0.01 * 0.75)
+
+
+def test_update_all(pool, alice, cubebtc, invbtc, btcusd):
+    pool.deposit(cubebtc, alice, {"from": alice, "value": "5 ether"})
+    pool.deposit(invbtc, alice, {"from": alice, "value": "15 ether"})
+
+    # funding changes price over time so always updates
+    chain.sleep(3600)
+    tx = pool.updateAll(0, {"from": alice})
+    assert len(tx.events["Update"]) == 2
+
+    # without funding, nothing is written if oracle price hasn't changed
+    pool.setMaxFundingFee(cubebtc, 0)
+    pool.setMaxFundingFee(invbtc, 0)
+    pool.updateAll(0, {"from": alice})
+    chain.sleep(3600)
+    tx = pool.updateAll(0, {"from": alice})
+    assert "Update" not in tx.events
+
+    # updates once oracle price changes
+    btcusd.setPrice(60000 * 1e8)
+    chain.sleep(3600)
+    tx = pool.updateAll(0, {"from": alice})
+    assert len(tx.events["Update"]) == 2
+
+    # skipped if updated recently
+    btcusd.setPrice(50000 * 1e8)
+    tx = pool.updateAll(3600, {"from": alice})
+    assert "Update" not in tx.events
+
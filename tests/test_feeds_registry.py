@@ -1,45 +1,48 @@
 from brownie import reverts, ZERO_ADDRESS
+from conftest import toBytes32
+import pytest
 
 
-def test_feeds_registry(
-    a, ChainlinkFeedsRegistry, MockAggregatorV3Interface, MockToken
-):
-    deployer, alice = a[:2]
+AAA = toBytes32("AAA")
+BBB = toBytes32("BBB")
+CCC = toBytes32("CCC")
+DDD = toBytes32("DDD")
+ETH = toBytes32("ETH")
+USD = toBytes32("USD")
 
-    aaausd = deployer.deploy(MockAggregatorV3Interface)
-    aaaeth = deployer.deploy(MockAggregatorV3Interface)
-    bbbeth = deployer.deploy(MockAggregatorV3Interface)
-    cccusd = deployer.deploy(MockAggregatorV3Interface)
-    ethusd = deployer.deploy(MockAggregatorV3Interface)
 
-    feeds = deployer.deploy(ChainlinkFeedsRegistry)
-    toBytes = lambda s: feeds.stringToBytes32(s)
+# deployed once for this module. prices are reset after each test
+@pytest.fixture(scope="module")
+def mockFeeds(gov, MockAggregatorV3Interface):
+    prices = [0.1 * 1e8, 0.0000555 * 1e18, 10 * 1e18, 100 * 1e8, 2000 * 1e8]
+    yield [gov.deploy(MockAggregatorV3Interface, price) for price in prices]
 
-    AAA = toBytes("AAA")
-    BBB = toBytes("BBB")
-    CCC = toBytes("CCC")
-    DDD = toBytes("DDD")
-    ETH = toBytes("ETH")
-    USD = toBytes("USD")
 
+def test_feeds_registry(
+    feedsRegistry, mockFeeds, gov, alice, MockAggregatorV3Interface
+):
+    aaausd, aaaeth, bbbeth, cccusd, ethusd = mockFeeds
+    feeds = feedsRegistry
+
+    assert feeds.stringToBytes32("AAA") == AAA
+    assert feeds.stringToBytes32("") == toBytes32("")
     assert feeds.ETH() == ETH
     assert feeds.USD() == USD
 
     with reverts("Ownable: caller is not the owner"):
-        feeds.addUsdFeed(AAA, aaausd, {"from": alice})
+        feeds.addUsdFeed("AAA", aaausd, {"from": alice})
     with reverts("Ownable: caller is not the owner"):
-        feeds.addEthFeed(AAA, aaaeth, {"from": alice})
+        feeds.addEthFeed("AAA", aaaeth, {"from": alice})
 
+    zerofeed = gov.deploy(MockAggregatorV3Interface, 0)
     with reverts("Price should be > 0"):
-        feeds.addUsdFeed(AAA, aaausd)
+        feeds.addUsdFeed("AAA", zerofeed)
     with reverts("Price should be > 0"):
-        feeds.addEthFeed(AAA, aaaeth)
-
-    aaausd.setPrice(0.1 * 1e8)
-    aaaeth.setPrice(0.0000555 * 1e18)
-    bbbeth.setPrice(10 * 1e18)
-    cccusd.setPrice(100 * 1e8)
-    ethusd.setPrice(2000 * 1e8)
+        feeds.addEthFeed("AAA", zerofeed)
+    with reverts("Price should be > 0"):
+        feeds.addUsdFeed("AAA", ZERO_ADDRESS)
+    with reverts("Price should be > 0"):
+        feeds.addEthFeed("AAA", ZERO_ADDRESS)
 
     feeds.addUsdFeed("AAA", aaausd)
     feeds.addEthFeed("BBB", bbbeth)
@@ -0,0 +1,19 @@
+from brownie import reverts
+
+
+FEE_INDEX = 6
+
+
+def test_set_deposit_withdraw_fees(pool, alice, cubebtc, invbtc):
+    with reverts("!governance"):
+        pool.setDepositWithdrawFees([cubebtc, invbtc], [100, 200], {"from": alice})
+    with reverts("Lengths don't match"):
+        pool.setDepositWithdrawFees([cubebtc, invbtc], [100])
+    with reverts("Fee should be < 100%"):
+        pool.setDepositWithdrawFees([cubebtc, invbtc], [100, 1e4])
+    with reverts("Not added"):
+        pool.setDepositWithdrawFees([cubebtc, alice], [100, 200])
+
+    pool.setDepositWithdrawFees([cubebtc, invbtc], [100, 200])
+    assert pool.params(cubebtc)[FEE_INDEX] == 100
+    assert pool.params(invbtc)[FEE_INDEX] == 200